@@ -0,0 +1,157 @@
+"""
+Exact-match response cache shared by the demo scripts.
+
+Purpose:
+  Avoid re-hitting the API when the same request is sent again (e.g. re-running a
+  script with the same --prompt while iterating). Responses are stored in a small
+  SQLite file keyed by a hash of the request parameters.
+
+Usage:
+  from _cache import cached_completion
+
+  create = cached_completion(client.chat.completions.create)
+  resp = create(model=..., messages=..., temperature=0)
+
+Notes:
+- Works with both sync (OpenAI) and async (AsyncOpenAI) `create` methods.
+- Streaming requests (stream=True) are never cached.
+- Use --no-cache on any script to bypass it.
+- Location defaults to ~/.zenith_cache; override with ZENITH_CACHE_DIR.
+- sqlite3 and inspect are imported on first use so importing this module stays cheap.
+"""
+from __future__ import annotations
+import functools
+import hashlib
+import importlib
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple
+
+if TYPE_CHECKING:
+    import sqlite3
+
+
+def cache_dir() -> Path:
+    return Path(os.getenv("ZENITH_CACHE_DIR", "~/.zenith_cache")).expanduser()
+
+
+@functools.lru_cache(maxsize=1)
+def _connect() -> Optional[sqlite3.Connection]:
+    """Open the cache database, or None (cache disabled) if it can't be created."""
+    import sqlite3
+
+    try:
+        path = cache_dir()
+        path.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path / "responses.sqlite")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, type TEXT NOT NULL, body TEXT NOT NULL)"
+        )
+    except (OSError, sqlite3.Error):
+        return None
+    return conn
+
+
+def make_key(**kwargs: Any) -> str:
+    """Hash the request parameters into a stable cache key.
+
+    Covers model, messages/prompt, temperature, top_p, stop, max_tokens, n and any
+    other keyword passed to `create`.
+    """
+    blob = json.dumps(kwargs, sort_keys=True, default=str)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def _load(key: str) -> Optional[Any]:
+    import sqlite3
+
+    # Any cache failure is treated as a miss
+    conn = _connect()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(
+            "SELECT type, body FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+    except (OSError, sqlite3.Error):
+        return None
+    if row is None:
+        return None
+    type_path, body = row
+    module_name, _, qualname = type_path.rpartition(":")
+    try:
+        cls = getattr(importlib.import_module(module_name), qualname)
+        return cls.model_validate_json(body)
+    except Exception:
+        return None
+
+
+def _store(key: str, resp: Any) -> None:
+    import sqlite3
+
+    cls = type(resp)
+    conn = _connect()
+    if conn is None:
+        return
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, type, body) VALUES (?, ?, ?)",
+            (key, f"{cls.__module__}:{cls.__qualname__}", resp.model_dump_json()),
+        )
+        conn.commit()
+    except (OSError, sqlite3.Error, AttributeError):
+        # A cache that cannot be written should never fail the request
+        pass
+
+
+def has_cached(**kwargs: Any) -> bool:
+    """True if the first response for these request parameters is already cached."""
+    return _load(f"{make_key(**kwargs)}:0") is not None
+
+
+def cached_completion(fn: Callable) -> Callable:
+    """Wrap a `create` method so identical requests are served from disk.
+
+    Repeats of the same request within one run (e.g. --n samples) get their own
+    cache slot, so a re-run replays N distinct samples instead of one sample N times.
+    """
+    import inspect
+
+    seen: Counter = Counter()
+
+    def _lookup(kwargs: dict) -> Tuple[Optional[str], Optional[Any]]:
+        if kwargs.get("stream"):
+            return None, None
+        base = make_key(**kwargs)
+        key = f"{base}:{seen[base]}"
+        seen[base] += 1
+        return key, _load(key)
+
+    if inspect.iscoroutinefunction(inspect.unwrap(fn)):
+
+        @functools.wraps(fn)
+        async def async_wrapper(**kwargs: Any) -> Any:
+            key, hit = _lookup(kwargs)
+            if hit is not None:
+                return hit
+            resp = await fn(**kwargs)
+            if key is not None:
+                _store(key, resp)
+            return resp
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(**kwargs: Any) -> Any:
+        key, hit = _lookup(kwargs)
+        if hit is not None:
+            return hit
+        resp = fn(**kwargs)
+        if key is not None:
+            _store(key, resp)
+        return resp
+
+    return wrapper
@@ -0,0 +1,138 @@
+"""
+Shared OpenAI clients for the demo scripts.
+
+Purpose:
+  Build each client once per process (per event loop for async) so repeated calls,
+  e.g. from a notebook sweeping parameters, reuse one pooled HTTP connection
+  instead of paying a fresh TLS handshake every time.
+
+Usage:
+  from _client import get_client, get_async_client, with_retry
+
+  client = get_client(api_key)                # OpenAI
+  client = get_async_client(api_key)          # AsyncOpenAI (inside a running loop)
+  create = with_retry(client.chat.completions.create)
+
+Notes:
+- Connections are pooled through the SDK's DefaultHttpxClient, so its timeouts and
+  redirect handling still apply. HTTP/2 multiplexing is used when the `h2` package
+  is installed (pip install h2); otherwise connections fall back to HTTP/1.1.
+- with_retry() retries rate-limit, connection and 5xx errors with jittered
+  exponential backoff (honouring Retry-After) when `tenacity` is installed
+  (pip install tenacity). The SDK's own retries are then turned off so the two
+  don't stack.
+- Importing this module is cheap: asyncio, inspect and openai load on first use.
+"""
+import functools
+import importlib.util
+from typing import Any, Callable, Optional
+
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE = 20
+RETRY_ATTEMPTS = 5
+RETRY_MAX_WAIT = 30.0
+
+
+def _has_tenacity() -> bool:
+    return importlib.util.find_spec("tenacity") is not None
+
+
+def _sdk_max_retries() -> int:
+    # 2 is the SDK default; with tenacity we retry ourselves in with_retry()
+    return 0 if _has_tenacity() else 2
+
+
+def _http_client(name: str) -> Any:
+    """Pooled openai.Default(Async)HttpxClient, or None to let the SDK build its own."""
+    import openai
+
+    cls = getattr(openai, name, None)
+    defaults = getattr(openai, "DEFAULT_CONNECTION_LIMITS", None)
+    if cls is None or defaults is None:
+        # Older SDKs: keep the SDK's built-in client
+        return None
+    # Build Limits from the SDK's own type (httpx or httpx2, depending on version)
+    limits = type(defaults)(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE)
+    try:
+        return cls(http2=True, limits=limits)
+    except ImportError:
+        # h2 not installed
+        return cls(limits=limits)
+
+
+@functools.lru_cache(maxsize=1)
+def get_client(api_key: str) -> Any:
+    """Process-wide sync client with a pooled (HTTP/2 when available) connection."""
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=api_key,
+        http_client=_http_client("DefaultHttpxClient"),
+        max_retries=_sdk_max_retries(),
+    )
+
+
+def get_async_client(api_key: str) -> Any:
+    """Async client shared by everything running on the current event loop."""
+    import asyncio
+
+    return _async_client(api_key, asyncio.get_running_loop())
+
+
+@functools.lru_cache(maxsize=4)
+def _async_client(api_key: str, loop: Any) -> Any:
+    # Keyed by loop: async connections cannot be reused across event loops
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
+        api_key=api_key,
+        http_client=_http_client("DefaultAsyncHttpxClient"),
+        max_retries=_sdk_max_retries(),
+    )
+
+
+def _retry_after(exc: Optional[BaseException]) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After header), if any."""
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return min(float(value), RETRY_MAX_WAIT) if value is not None else None
+    except ValueError:
+        return None
+
+
+def with_retry(fn: Callable) -> Callable:
+    """Wrap a `create` method to retry transient API errors with backoff + jitter.
+
+    Returns `fn` unchanged when tenacity is not installed.
+    """
+    import inspect
+
+    try:
+        import tenacity  # type: ignore
+        from openai import APIConnectionError, InternalServerError, RateLimitError
+    except ImportError:
+        return fn
+
+    backoff = tenacity.wait_exponential_jitter(initial=1, max=RETRY_MAX_WAIT)
+
+    def wait(retry_state: Any) -> float:
+        delay = _retry_after(retry_state.outcome.exception())
+        return backoff(retry_state) if delay is None else delay
+
+    retry = tenacity.retry(
+        retry=tenacity.retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+        wait=wait,
+        stop=tenacity.stop_after_attempt(RETRY_ATTEMPTS),
+        reraise=True,
+    )
+
+    if inspect.iscoroutinefunction(inspect.unwrap(fn)):
+        # SDK methods are sync wrappers around coroutines; give tenacity a real
+        # coroutine function so it awaits (and retries) the request itself
+        @functools.wraps(fn)
+        async def call(**kwargs: Any) -> Any:
+            return await fn(**kwargs)
+
+        return retry(call)
+    return retry(fn)
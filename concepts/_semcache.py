@@ -0,0 +1,113 @@
+"""
+Semantic (embedding-similarity) response cache.
+
+Purpose:
+  Catch paraphrases that the exact-match cache in _cache.py misses. Prompts are
+  embedded locally and stored in a small HNSW index; when a new prompt is close
+  enough (cosine similarity >= threshold) to a cached one, its answer is reused.
+
+Usage:
+  from _semcache import SemanticCache
+
+  cache = SemanticCache("zero_shot", model="gpt-4o-mini", temperature=0.7, threshold=0.92)
+  hit = cache.lookup(prompt)         # (answer, similarity) or None
+  if hit is None:
+      ...  # call the API
+      cache.add(prompt, answer)
+
+Notes:
+- Optional: requires `sentence-transformers` and `hnswlib`
+  (pip install sentence-transformers hnswlib). Without them the cache is disabled.
+- Embeddings use all-MiniLM-L6-v2 on CPU (no network latency per lookup).
+- Stored under ~/.zenith_semcache/<namespace>/<model>-t<temperature>/
+  (index.bin + responses.json); override the root with ZENITH_SEMCACHE_DIR.
+  Answers are only reused for the same script, model and temperature.
+- Loading the embedding model takes seconds, so callers should consult the
+  exact-match cache (_cache.py) first.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+EMBED_MODEL = "all-MiniLM-L6-v2"
+EMBED_DIM = 384
+DEFAULT_THRESHOLD = 0.92
+
+
+class SemanticCache:
+    """Nearest-neighbour lookup of previous answers, scoped per script, model and temperature."""
+
+    def __init__(
+        self, namespace: str, model: str, temperature: float, threshold: float = DEFAULT_THRESHOLD
+    ):
+        root = Path(os.getenv("ZENITH_SEMCACHE_DIR", "~/.zenith_semcache")).expanduser()
+        scope = re.sub(r"[^\w.-]", "_", f"{model}-t{temperature}")
+        self.dir = root / namespace / scope
+        self.threshold = threshold
+        self.enabled = True
+        self._encoder: Any = None
+        self._index: Any = None
+        self._entries: List[Dict[str, str]] = []
+
+    def _load(self) -> bool:
+        if self._index is not None:
+            return True
+        if not self.enabled:
+            return False
+        # First use may download the model; offline or on any load error, skip caching
+        try:
+            import hnswlib  # type: ignore
+            from sentence_transformers import SentenceTransformer  # type: ignore
+
+            encoder = SentenceTransformer(EMBED_MODEL, device="cpu")
+            index = hnswlib.Index(space="cosine", dim=EMBED_DIM)
+            try:
+                entries = json.loads((self.dir / "responses.json").read_text(encoding="utf-8"))
+                index.load_index(str(self.dir / "index.bin"), max_elements=max(len(entries), 16))
+                if index.get_current_count() != len(entries):
+                    # A failed or concurrent write left the two files out of step
+                    raise ValueError("semantic cache index does not match responses.json")
+            except Exception:
+                entries = []
+                index = hnswlib.Index(space="cosine", dim=EMBED_DIM)
+                index.init_index(max_elements=16, ef_construction=200, M=16)
+        except Exception:
+            self.enabled = False
+            return False
+        self._encoder, self._index, self._entries = encoder, index, entries
+        return True
+
+    def _embed(self, text: str):
+        return self._encoder.encode([text], normalize_embeddings=True)
+
+    def lookup(self, prompt: str) -> Optional[Tuple[str, float]]:
+        """Return (cached answer, similarity) for a semantically similar prompt, if any."""
+        if not self._load() or not self._entries:
+            return None
+        labels, distances = self._index.knn_query(self._embed(prompt), k=1)
+        label = int(labels[0][0])
+        similarity = 1.0 - float(distances[0][0])
+        if label >= len(self._entries) or similarity < self.threshold:
+            return None
+        return self._entries[label]["response"], similarity
+
+    def add(self, prompt: str, response: str) -> None:
+        if not self._load():
+            return
+        label = len(self._entries)
+        if label >= self._index.get_max_elements():
+            self._index.resize_index(label * 2)
+        self._index.add_items(self._embed(prompt), [label])
+        self._entries.append({"prompt": prompt, "response": response})
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self._index.save_index(str(self.dir / "index.bin"))
+            (self.dir / "responses.json").write_text(
+                json.dumps(self._entries, ensure_ascii=False), encoding="utf-8"
+            )
+        except OSError as e:
+            print(f"Warning: could not persist semantic cache: {e}", file=sys.stderr)
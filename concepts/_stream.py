@@ -0,0 +1,86 @@
+"""
+Helpers for printing streamed completions as they arrive.
+
+Purpose:
+  With stream=True the API sends the answer in small deltas; writing each delta
+  straight to stdout shows the first words after ~first-token latency instead of
+  waiting for the whole completion.
+
+Usage:
+  from _stream import write_stream
+
+  resp = client.chat.completions.create(..., stream=True)
+  text = write_stream(resp)      # async clients: text = await awrite_stream(resp)
+
+Notes:
+- Deltas are often a few characters long, so output is batched: stdout is written
+  and flushed every FLUSH_CHARS characters or at a newline, not once per delta.
+"""
+import sys
+from typing import Any, List
+
+FLUSH_CHARS = 64
+
+
+class StreamWriter:
+    """Buffers streamed text and writes it to stdout in small batches."""
+
+    def __init__(self) -> None:
+        self.pending: List[str] = []
+        self.size = 0
+
+    def write(self, text: str) -> None:
+        self.pending.append(text)
+        self.size += len(text)
+        if self.size >= FLUSH_CHARS or "\n" in text:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            sys.stdout.write("".join(self.pending))
+            sys.stdout.flush()
+            self.pending.clear()
+            self.size = 0
+
+
+def chunk_text(chunk: Any) -> str:
+    """Text carried by one streamed chunk (chat delta or legacy completion text)."""
+    if not chunk.choices:
+        return ""
+    choice = chunk.choices[0]
+    delta = getattr(choice, "delta", None)
+    if delta is not None:
+        return delta.content or ""
+    return getattr(choice, "text", None) or ""
+
+
+def write_stream(resp: Any) -> str:
+    """Write a sync stream to stdout as it arrives; return the full text."""
+    out = StreamWriter()
+    parts = []
+    try:
+        for chunk in resp:
+            text = chunk_text(chunk)
+            if text:
+                out.write(text)
+                parts.append(text)
+    finally:
+        # Show whatever arrived even if the stream breaks midway
+        out.flush()
+    return "".join(parts)
+
+
+async def awrite_stream(resp: Any) -> str:
+    """Async counterpart of `write_stream` for AsyncOpenAI streams."""
+    out = StreamWriter()
+    parts = []
+    try:
+        async for chunk in resp:
+            text = chunk_text(chunk)
+            if text:
+                out.write(text)
+                parts.append(text)
+    finally:
+        # Show whatever arrived even if the stream breaks midway
+        out.flush()
+    return "".join(parts)
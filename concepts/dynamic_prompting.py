@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Dynamic prompting demo (standalone).
+Dynamic prompting demo.
 
 Purpose:
   Show how to build prompts dynamically from variables like role, task, style, and constraints.
@@ -16,24 +16,40 @@ Usage:
       --temperature 0.6
 
 Notes:
-- Only depends on the OpenAI Python SDK.
+- Requires the OpenAI Python SDK and the helper modules next to this script
+  (_cache.py, _client.py, _semcache.py, _stream.py); copy them along with it.
+- Optional: tenacity (retries), h2 (HTTP/2), sentence-transformers + hnswlib (--semcache).
 - Outputs plain text to stdout.
+- Responses are cached locally (see _cache.py); pass --no-cache to force a fresh call.
+- --semcache reuses answers for semantically similar prompts when sentence-transformers
+  and hnswlib are installed (see _semcache.py). Off by default: prompts that differ only
+  in --style or --constraints embed almost identically and would replay the wrong answer.
+  Answers served from it are flagged on stderr.
 """
 import os
 import argparse
+import functools
 import sys
 
+from _cache import cached_completion, has_cached
+from _client import get_client, with_retry
+from _semcache import DEFAULT_THRESHOLD, SemanticCache
+from _stream import write_stream
 
+
+@functools.lru_cache(maxsize=256)
 def build_prompt(role: str, task: str, style: str, constraints: str) -> str:
-    """Create a simple, readable dynamic prompt from user inputs."""
-    lines = [
-        f"You are a {role}.",
-        f"Task: {task}.",
-        f"Write the answer in {style}.",
-        f"Constraints: {constraints}.",
-        "Be clear, actionable, and concise.",
-    ]
-    return "\n".join(lines)
+    """Create a simple, readable dynamic prompt from user inputs.
+
+    Memoized: sweeps that repeat the same inputs get the same string back.
+    """
+    return (
+        f"You are a {role}.\n"
+        f"Task: {task}.\n"
+        f"Write the answer in {style}.\n"
+        f"Constraints: {constraints}.\n"
+        "Be clear, actionable, and concise."
+    )
 
 
 def parse_args():
@@ -49,27 +65,31 @@ def parse_args():
     p.add_argument("--model", default=os.getenv("MODEL", "gpt-4o-mini"))
     p.add_argument("--temperature", type=float, default=0.6)
     p.add_argument("--show-prompt", action="store_true", help="Print the built prompt before sending")
+    p.add_argument("--no-cache", action="store_true", help="Always call the API; skip the local response cache")
+    p.add_argument(
+        "--semcache",
+        action="store_true",
+        help="Reuse cached answers for semantically similar prompts (needs sentence-transformers, hnswlib)",
+    )
+    p.add_argument(
+        "--semcache-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Cosine similarity needed to reuse a cached answer for a similar prompt",
+    )
+    p.add_argument("--dry-run", action="store_true", help="Print the prompt and exit without calling the API")
+    p.add_argument("--stream", action="store_true", help="Print the answer as it is generated")
     return p.parse_args()
 
 
 def main():
     args = parse_args()
-
-    try:
-        from openai import OpenAI
-    except Exception:
-        print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
-        sys.exit(1)
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if not (api_key := os.environ.get("OPENAI_API_KEY")) and not args.dry_run:
         print("Error: Please set OPENAI_API_KEY in your environment.", file=sys.stderr)
         sys.exit(1)
 
-    client = OpenAI(api_key=api_key)
-
     user_prompt = build_prompt(args.role, args.task, args.style, args.constraints)
-    if args.show_prompt:
+    if args.show_prompt or args.dry_run:
         print("=== Built Prompt ===\n" + user_prompt + "\n====================\n")
 
     messages = [
@@ -77,17 +97,48 @@ def main():
         {"role": "user", "content": user_prompt},
     ]
 
+    if args.dry_run:
+        return
+
+    try:
+        client = get_client(api_key)
+    except ImportError as e:
+        if e.name == "openai":
+            print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
+        else:
+            print(f"Error: could not set up the OpenAI client: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    create = with_retry(client.chat.completions.create)
+    params = dict(model=args.model, messages=messages, temperature=args.temperature)
+    semcache = None
+    if not args.no_cache:
+        create = cached_completion(create)
+        # Loading the embedder takes seconds, so only fall back to the semantic
+        # cache (paraphrases of an earlier prompt) on an exact-match miss
+        if args.semcache and not has_cached(**params):
+            semcache = SemanticCache(
+                "dynamic", model=args.model, temperature=args.temperature, threshold=args.semcache_threshold
+            )
+            hit = semcache.lookup(user_prompt)
+            if hit is not None:
+                answer, similarity = hit
+                print(f"(semantic cache hit, similarity {similarity:.3f})", file=sys.stderr)
+                print(answer)
+                return
+
     try:
-        resp = client.chat.completions.create(
-            model=args.model,
-            messages=messages,
-            temperature=args.temperature,
-        )
+        if args.stream:
+            content = write_stream(create(**params, stream=True))
+        else:
+            content = create(**params).choices[0].message.content
     except Exception as e:
         print(f"Request failed: {e}", file=sys.stderr)
         sys.exit(2)
 
-    print(resp.choices[0].message.content)
+    if semcache is not None and content:
+        semcache.add(user_prompt, content)
+    print("" if args.stream else content)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Stop sequences demo (standalone).
+Stop sequences demo.
 
 Purpose:
   Show how stop sequences can be used to control where the model should stop generating.
@@ -19,13 +19,26 @@ Usage:
       --model gpt-4o-mini
 
 Notes:
+- Requires the OpenAI Python SDK and the helper modules next to this script
+  (_cache.py, _client.py, _stream.py); copy them along with it.
+- Optional: tenacity (retries), h2 (HTTP/2).
 - When a stop sequence is encountered, generation ends and the sequence is not included in the output.
 - Combine with max_tokens to set a hard cap as a backup.
+- With --stream the answer prints as it arrives and stops are also matched client-side.
+- Responses are cached locally (see _cache.py); pass --no-cache to force a fresh call.
 """
 import os
 import argparse
+import re
 import sys
-from typing import List
+from typing import Any, List, Optional, Tuple
+
+from _cache import cached_completion
+from _client import get_client, with_retry
+from _stream import StreamWriter, chunk_text
+
+# One comma-separated item with surrounding whitespace trimmed; blank items never match
+_STOP_RE = re.compile(r"[^,\s](?:[^,]*[^,\s])?")
 
 
 def parse_args():
@@ -51,7 +64,7 @@ def parse_args():
     p.add_argument(
         "--stop",
         default=None,
-        help="Comma-separated list of stop sequences (e.g., ")\n,\n\n")",
+        help="Comma-separated list of stop sequences (e.g., ')\\n,\\n\\n')",
     )
     p.add_argument(
         "--max-tokens",
@@ -61,32 +74,79 @@ def parse_args():
         help="Optional hard cap on tokens to generate",
     )
     p.add_argument("--show-prompt", action="store_true", help="Print the constructed messages")
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        dest="no_cache",
+        help="Always call the API; skip the local response cache",
+    )
+    p.add_argument(
+        "--dry-run",
+        action="store_true",
+        dest="dry_run",
+        help="Print the constructed messages and exit without calling the API",
+    )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the answer as it is generated (stops are also enforced client-side)",
+    )
     return p.parse_args()
 
 
 def parse_stops(stop_str: str | None) -> List[str] | None:
     if not stop_str:
         return None
-    parts = [s for s in (x.strip() for x in stop_str.split(",")) if s]
-    return parts or None
+    if "," not in stop_str:
+        s = stop_str.strip()
+        return [s] if s else None
+    return _STOP_RE.findall(stop_str) or None
+
+
+def stream_until_stop(resp: Any, stops: List[str] | None) -> Tuple[str, Optional[str]]:
+    """Print a streamed answer, cutting it off at the first stop sequence seen.
+
+    The server normally stops on its own, but matching locally as well lets us
+    close the stream the moment a stop appears. The last len(longest stop) - 1
+    characters are held back so a stop split across chunks is never printed.
+    Returns (text, finish_reason).
+    """
+    hold = max(map(len, stops)) - 1 if stops else 0
+    out = StreamWriter()
+    parts: List[str] = []
+    pending = ""
+    finish_reason: Optional[str] = None
+    try:
+        for chunk in resp:
+            pending += chunk_text(chunk)
+            if chunk.choices and chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+            if stops:
+                hits = [i for i in (pending.find(s) for s in stops) if i != -1]
+                if hits:
+                    pending = pending[: min(hits)]
+                    finish_reason = "stop"
+                    resp.close()
+                    break
+            if len(pending) > hold:
+                cut = len(pending) - hold
+                out.write(pending[:cut])
+                parts.append(pending[:cut])
+                pending = pending[cut:]
+        out.write(pending)
+        parts.append(pending)
+    finally:
+        # Show whatever arrived even if the stream breaks midway
+        out.flush()
+    return "".join(parts), finish_reason
 
 
 def main():
     args = parse_args()
-
-    try:
-        from openai import OpenAI
-    except Exception:
-        print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
-        sys.exit(1)
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if not (api_key := os.environ.get("OPENAI_API_KEY")) and not args.dry_run:
         print("Error: Please set OPENAI_API_KEY in your environment.", file=sys.stderr)
         sys.exit(1)
 
-    client = OpenAI(api_key=api_key)
-
     messages = [
         {"role": "system", "content": "You are a helpful, concise assistant."},
         {"role": "user", "content": args.prompt},
@@ -94,29 +154,50 @@ def main():
 
     stops = parse_stops(args.stop)
 
-    if args.show_prompt:
+    if args.show_prompt or args.dry_run:
         print("=== Messages ===")
         for i, m in enumerate(messages, 1):
             print(f"[{i}] {m['role']}: {m['content']}")
         print("Stops:", stops)
         print("================\n")
 
+    if args.dry_run:
+        return
+
+    try:
+        client = get_client(api_key)
+    except ImportError as e:
+        if e.name == "openai":
+            print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
+        else:
+            print(f"Error: could not set up the OpenAI client: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    create = with_retry(client.chat.completions.create)
+    if not args.no_cache:
+        create = cached_completion(create)
+
+    params = dict(
+        model=args.model,
+        messages=messages,
+        temperature=args.temperature,
+        stop=stops,
+        max_tokens=args.max_tokens,
+    )
     try:
-        resp = client.chat.completions.create(
-            model=args.model,
-            messages=messages,
-            temperature=args.temperature,
-            stop=stops,
-            max_tokens=args.max_tokens,
-        )
+        if args.stream:
+            _, finish_reason = stream_until_stop(create(**params, stream=True), stops)
+            print()
+        else:
+            choice = create(**params).choices[0]
+            print(choice.message.content)
+            finish_reason = getattr(choice, "finish_reason", None)
     except Exception as e:
         print(f"Request failed: {e}", file=sys.stderr)
         sys.exit(2)
 
-    choice = resp.choices[0]
-    print(choice.message.content)
-    if hasattr(choice, "finish_reason"):
-        print(f"\n[finish_reason: {choice.finish_reason}]")
+    if finish_reason is not None:
+        print(f"\n[finish_reason: {finish_reason}]")
 
 
 if __name__ == "__main__":
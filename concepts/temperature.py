@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Temperature demo (standalone).
+Temperature demo.
 
 Purpose:
   Show how different temperature values affect creativity and variability in outputs.
@@ -19,14 +19,33 @@ Usage:
       --model gpt-4o-mini
 
 Notes:
+- Requires the OpenAI Python SDK and the helper modules next to this script
+  (_cache.py, _client.py, _stream.py); copy them along with it.
+- Optional: tenacity (retries), h2 (HTTP/2).
 - Higher temperature => more diverse and creative outputs, but potentially less factual/consistent.
 - Lower temperature => more deterministic and conservative outputs.
+- --n samples are requested in a single call per temperature (chat `n`, or a batched
+  prompt list for legacy completion models such as gpt-3.5-turbo-instruct).
+- Legacy completion models get max_tokens=256 unless --max-tokens is set (their
+  endpoint otherwise cuts every sample off at 16 tokens).
+- Sweep requests are sent concurrently (capped by --max-concurrent) and printed in order.
+- Only temperature 0 responses are cached locally by default (see _cache.py), so reruns
+  show fresh samples; --cache caches sampled responses too, --no-cache disables caching.
 """
 import os
 import argparse
+import asyncio
+import io
 import sys
 from typing import List
 
+from _cache import cached_completion
+from _client import get_async_client, with_retry
+from _stream import awrite_stream
+
+# The legacy Completions endpoint stops at 16 tokens unless max_tokens is sent
+LEGACY_MAX_TOKENS = 256
+
 
 def parse_args():
     p = argparse.ArgumentParser(description="Temperature effect demo")
@@ -59,6 +78,42 @@ def parse_args():
         default=1,
         help="Generate N outputs per temperature (>=1)",
     )
+    p.add_argument(
+        "--max-tokens",
+        type=int,
+        default=None,
+        dest="max_tokens",
+        help=f"Optional hard cap on tokens to generate (legacy completion models: default {LEGACY_MAX_TOKENS})",
+    )
+    p.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=8,
+        dest="max_concurrent",
+        help="Maximum number of requests in flight at once (respect your RPM limits)",
+    )
+    p.add_argument(
+        "--cache",
+        action="store_true",
+        help="Also cache sampled (temperature > 0) responses; reruns then replay earlier samples",
+    )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        dest="no_cache",
+        help="Always call the API; skip the local response cache",
+    )
+    p.add_argument(
+        "--dry-run",
+        action="store_true",
+        dest="dry_run",
+        help="Print the constructed messages and exit without calling the API",
+    )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print each sample as it is generated (samples then run one at a time)",
+    )
     return p.parse_args()
 
 
@@ -77,22 +132,15 @@ def parse_sweep(sweep_str: str) -> List[float]:
     return vals
 
 
-def main():
-    args = parse_args()
-
-    try:
-        from openai import OpenAI
-    except Exception:
-        print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
-        sys.exit(1)
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("Error: Please set OPENAI_API_KEY in your environment.", file=sys.stderr)
-        sys.exit(1)
+def is_completions_model(model: str) -> bool:
+    """Return True for legacy models served by the Completions (not Chat) endpoint."""
+    m = model.lower()
+    return "instruct" in m or m.startswith(("davinci", "babbage"))
 
-    client = OpenAI(api_key=api_key)
 
+async def run(args, api_key: str) -> None:
+    if args.n < 1:
+        raise SystemExit("--n must be >= 1")
     temps = parse_sweep(args.sweep) if args.sweep else [args.temperature]
 
     messages = [
@@ -100,25 +148,108 @@ def main():
         {"role": "user", "content": args.prompt},
     ]
 
-    for t in temps:
-        print(f"\n=== Temperature: {t} ===\n")
-        for i in range(args.n):
-            try:
-                resp = client.chat.completions.create(
+    if args.dry_run:
+        print("=== Messages ===")
+        for i, m in enumerate(messages, 1):
+            print(f"[{i}] {m['role']}: {m['content']}")
+        print("================")
+        return
+
+    try:
+        client = get_async_client(api_key)
+    except ImportError as e:
+        if e.name == "openai":
+            print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
+        else:
+            print(f"Error: could not set up the OpenAI client: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    legacy = is_completions_model(args.model)
+    fresh = (with_retry(client.chat.completions.create), with_retry(client.completions.create))
+    cached = fresh if args.no_cache else tuple(cached_completion(fn) for fn in fresh)
+
+    def endpoints(t: float):
+        # Replaying a cached sample would hide exactly the variability this demo shows
+        return cached if t == 0 or args.cache else fresh
+
+    chat_extra = {} if args.max_tokens is None else {"max_tokens": args.max_tokens}
+    legacy_max_tokens = LEGACY_MAX_TOKENS if args.max_tokens is None else args.max_tokens
+
+    if args.stream:
+        # Concurrent streams would interleave on stdout, so stream one sample at a time
+        for t in temps:
+            print(f"\n=== Temperature: {t} ===\n")
+            create, complete = endpoints(t)
+            for i in range(args.n):
+                if args.n > 1:
+                    print(f"-- Sample {i+1} --")
+                try:
+                    if legacy:
+                        resp = await complete(
+                            model=args.model, prompt=args.prompt, temperature=t, max_tokens=legacy_max_tokens, stream=True
+                        )
+                    else:
+                        resp = await create(model=args.model, messages=messages, temperature=t, stream=True, **chat_extra)
+                    await awrite_stream(resp)
+                except Exception as e:
+                    print(f"Request failed at temperature {t}: {e}", file=sys.stderr)
+                    sys.exit(2)
+                print()
+                if args.n > 1:
+                    print()
+        return
+
+    # One request per temperature: ask for all N samples at once instead of looping.
+    # The semaphore caps how many temperatures are in flight together.
+    sem = asyncio.Semaphore(max(1, args.max_concurrent))
+
+    async def request(t: float) -> List[str]:
+        create, complete = endpoints(t)
+        async with sem:
+            if legacy:
+                # Legacy completions accept a list of prompts; choice.index maps back to it
+                resp = await complete(
                     model=args.model,
-                    messages=messages,
+                    prompt=[args.prompt] * args.n,
                     temperature=t,
+                    max_tokens=legacy_max_tokens,
                 )
-            except Exception as e:
-                print(f"Request failed at temperature {t}: {e}", file=sys.stderr)
-                sys.exit(2)
+                return [c.text for c in sorted(resp.choices, key=lambda c: c.index)]
+            resp = await create(
+                model=args.model,
+                messages=messages,
+                temperature=t,
+                n=args.n,
+                **chat_extra,
+            )
+            return [c.message.content for c in sorted(resp.choices, key=lambda c: c.index)]
+
+    results = await asyncio.gather(*(request(t) for t in temps), return_exceptions=True)
+
+    # Print in sweep order once everything has completed
+    for t, samples in zip(temps, results):
+        print(f"\n=== Temperature: {t} ===\n")
+        if isinstance(samples, BaseException):
+            print(f"Request failed at temperature {t}: {samples}", file=sys.stderr)
+            sys.exit(2)
 
-            content = resp.choices[0].message.content
+        for i, content in enumerate(samples):
+            # One stdout write per sample instead of several print calls
+            buf = io.StringIO()
             if args.n > 1:
-                print(f"-- Sample {i+1} --")
-            print(content)
+                buf.write(f"-- Sample {i+1} --\n")
+            buf.write(f"{content}\n")
             if args.n > 1:
-                print()
+                buf.write("\n")
+            sys.stdout.write(buf.getvalue())
+
+
+def main():
+    args = parse_args()
+    if not (api_key := os.environ.get("OPENAI_API_KEY")) and not args.dry_run:
+        print("Error: Please set OPENAI_API_KEY in your environment.", file=sys.stderr)
+        sys.exit(1)
+    asyncio.run(run(args, api_key))
 
 
 if __name__ == "__main__":
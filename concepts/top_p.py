@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Top P (nucleus sampling) demo (standalone).
+Top P (nucleus sampling) demo.
 
 Purpose:
   Show how different top_p values affect output diversity by limiting tokens to
@@ -20,14 +20,26 @@ Usage:
       --model gpt-4o-mini
 
 Notes:
+- Requires the OpenAI Python SDK and the helper modules next to this script
+  (_cache.py, _client.py, _stream.py); copy them along with it.
+- Optional: tenacity (retries), h2 (HTTP/2).
 - Lower top_p focuses on the most probable tokens; higher values allow more variety.
 - Keep temperature constant when comparing top_p to isolate its effect.
+- Sweep requests are sent concurrently (capped by --max-concurrent) and printed in order.
+- Only temperature 0 responses are cached locally by default (see _cache.py), so reruns
+  show fresh samples; --cache caches sampled responses too, --no-cache disables caching.
 """
 import os
 import argparse
+import asyncio
+import io
 import sys
 from typing import List
 
+from _cache import cached_completion
+from _client import get_async_client, with_retry
+from _stream import awrite_stream
+
 
 def parse_args():
     p = argparse.ArgumentParser(description="Top P (nucleus sampling) demo")
@@ -67,6 +79,35 @@ def parse_args():
         default=1,
         help="Generate N outputs per top_p value (>=1)",
     )
+    p.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=8,
+        dest="max_concurrent",
+        help="Maximum number of requests in flight at once (respect your RPM limits)",
+    )
+    p.add_argument(
+        "--cache",
+        action="store_true",
+        help="Also cache sampled (temperature > 0) responses; reruns then replay earlier samples",
+    )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        dest="no_cache",
+        help="Always call the API; skip the local response cache",
+    )
+    p.add_argument(
+        "--dry-run",
+        action="store_true",
+        dest="dry_run",
+        help="Print the constructed messages and exit without calling the API",
+    )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print each sample as it is generated (samples then run one at a time)",
+    )
     return p.parse_args()
 
 
@@ -88,22 +129,7 @@ def parse_sweep(sweep_str: str) -> List[float]:
     return vals
 
 
-def main():
-    args = parse_args()
-
-    try:
-        from openai import OpenAI
-    except Exception:
-        print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
-        sys.exit(1)
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("Error: Please set OPENAI_API_KEY in your environment.", file=sys.stderr)
-        sys.exit(1)
-
-    client = OpenAI(api_key=api_key)
-
+async def run(args, api_key: str) -> None:
     p_vals = parse_sweep(args.sweep) if args.sweep else [args.top_p]
 
     messages = [
@@ -111,26 +137,90 @@ def main():
         {"role": "user", "content": args.prompt},
     ]
 
-    for p_val in p_vals:
-        print(f"\n=== top_p: {p_val} (temperature={args.temperature}) ===\n")
-        for i in range(args.n):
-            try:
-                resp = client.chat.completions.create(
-                    model=args.model,
-                    messages=messages,
-                    temperature=args.temperature,
-                    top_p=p_val,
-                )
-            except Exception as e:
-                print(f"Request failed at top_p {p_val}: {e}", file=sys.stderr)
-                sys.exit(2)
-
-            content = resp.choices[0].message.content
-            if args.n > 1:
-                print(f"-- Sample {i+1} --")
-            print(content)
-            if args.n > 1:
+    if args.dry_run:
+        print("=== Messages ===")
+        for i, m in enumerate(messages, 1):
+            print(f"[{i}] {m['role']}: {m['content']}")
+        print("================")
+        return
+
+    try:
+        client = get_async_client(api_key)
+    except ImportError as e:
+        if e.name == "openai":
+            print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
+        else:
+            print(f"Error: could not set up the OpenAI client: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    create = with_retry(client.chat.completions.create)
+    # Replaying cached samples would hide exactly the variability this demo shows
+    if not args.no_cache and (args.temperature == 0 or args.cache):
+        create = cached_completion(create)
+
+    if args.stream:
+        # Concurrent streams would interleave on stdout, so stream one sample at a time
+        for p_val in p_vals:
+            print(f"\n=== top_p: {p_val} (temperature={args.temperature}) ===\n")
+            for i in range(args.n):
+                if args.n > 1:
+                    print(f"-- Sample {i+1} --")
+                try:
+                    resp = await create(
+                        model=args.model,
+                        messages=messages,
+                        temperature=args.temperature,
+                        top_p=p_val,
+                        stream=True,
+                    )
+                    await awrite_stream(resp)
+                except Exception as e:
+                    print(f"Request failed at top_p {p_val}: {e}", file=sys.stderr)
+                    sys.exit(2)
                 print()
+                if args.n > 1:
+                    print()
+        return
+
+    # Fire every (top_p x sample) request at once; the semaphore caps fan-out.
+    sem = asyncio.Semaphore(max(1, args.max_concurrent))
+
+    async def request(p_val: float):
+        async with sem:
+            return await create(
+                model=args.model,
+                messages=messages,
+                temperature=args.temperature,
+                top_p=p_val,
+            )
+
+    jobs = [(p_val, i) for p_val in p_vals for i in range(args.n)]
+    results = await asyncio.gather(*(request(p_val) for p_val, _ in jobs), return_exceptions=True)
+
+    # Print in sweep order once everything has completed
+    for (p_val, i), resp in zip(jobs, results):
+        if i == 0:
+            print(f"\n=== top_p: {p_val} (temperature={args.temperature}) ===\n")
+        if isinstance(resp, BaseException):
+            print(f"Request failed at top_p {p_val}: {resp}", file=sys.stderr)
+            sys.exit(2)
+
+        # One stdout write per sample instead of several print calls
+        buf = io.StringIO()
+        if args.n > 1:
+            buf.write(f"-- Sample {i+1} --\n")
+        buf.write(f"{resp.choices[0].message.content}\n")
+        if args.n > 1:
+            buf.write("\n")
+        sys.stdout.write(buf.getvalue())
+
+
+def main():
+    args = parse_args()
+    if not (api_key := os.environ.get("OPENAI_API_KEY")) and not args.dry_run:
+        print("Error: Please set OPENAI_API_KEY in your environment.", file=sys.stderr)
+        sys.exit(1)
+    asyncio.run(run(args, api_key))
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Zero-shot prompting demo (standalone).
+Zero-shot prompting demo.
 
 Purpose:
   Show a minimal prompt with no examples and get a helpful answer.
@@ -13,13 +13,25 @@ Usage:
       --temperature 0.7
 
 Notes:
-- Only depends on the OpenAI Python SDK.
+- Requires the OpenAI Python SDK and the helper modules next to this script
+  (_cache.py, _client.py, _semcache.py, _stream.py); copy them along with it.
+- Optional: tenacity (retries), h2 (HTTP/2), sentence-transformers + hnswlib (--semcache).
 - Outputs plain text to stdout.
+- Responses are cached locally (see _cache.py); pass --no-cache to force a fresh call.
+- --semcache reuses answers for semantically similar instructions when sentence-transformers
+  and hnswlib are installed (see _semcache.py). Off by default: "Explain X for a beginner"
+  and "...for an expert" embed almost identically and would replay the wrong answer.
+  Answers served from it are flagged on stderr.
 """
 import os
 import argparse
 import sys
 
+from _cache import cached_completion, has_cached
+from _client import get_client, with_retry
+from _semcache import DEFAULT_THRESHOLD, SemanticCache
+from _stream import write_stream
+
 
 def parse_args():
     p = argparse.ArgumentParser(description="Zero-shot prompting CLI")
@@ -39,41 +51,95 @@ def parse_args():
         default=0.7,
         help="Sampling temperature (0.0-2.0)",
     )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        dest="no_cache",
+        help="Always call the API; skip the local response cache",
+    )
+    p.add_argument(
+        "--semcache",
+        action="store_true",
+        help="Reuse cached answers for semantically similar instructions (needs sentence-transformers, hnswlib)",
+    )
+    p.add_argument(
+        "--semcache-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        dest="semcache_threshold",
+        help="Cosine similarity needed to reuse a cached answer for a similar instruction",
+    )
+    p.add_argument(
+        "--dry-run",
+        action="store_true",
+        dest="dry_run",
+        help="Print the constructed messages and exit without calling the API",
+    )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the answer as it is generated",
+    )
     return p.parse_args()
 
 
 def main():
     args = parse_args()
-
-    try:
-        from openai import OpenAI
-    except Exception:
-        print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
-        sys.exit(1)
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if not (api_key := os.environ.get("OPENAI_API_KEY")) and not args.dry_run:
         print("Error: Please set OPENAI_API_KEY in your environment.", file=sys.stderr)
         sys.exit(1)
 
-    client = OpenAI(api_key=api_key)
-
     messages = [
         {"role": "system", "content": "You are a concise, helpful assistant."},
         {"role": "user", "content": args.instruction},
     ]
 
+    if args.dry_run:
+        print("=== Messages ===")
+        for i, m in enumerate(messages, 1):
+            print(f"[{i}] {m['role']}: {m['content']}")
+        print("================")
+        return
+
+    try:
+        client = get_client(api_key)
+    except ImportError as e:
+        if e.name == "openai":
+            print("Error: openai package not found. Install with: pip install openai", file=sys.stderr)
+        else:
+            print(f"Error: could not set up the OpenAI client: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    create = with_retry(client.chat.completions.create)
+    params = dict(model=args.model, messages=messages, temperature=args.temperature)
+    semcache = None
+    if not args.no_cache:
+        create = cached_completion(create)
+        # Loading the embedder takes seconds, so only fall back to the semantic
+        # cache (paraphrases of an earlier prompt) on an exact-match miss
+        if args.semcache and not has_cached(**params):
+            semcache = SemanticCache(
+                "zero_shot", model=args.model, temperature=args.temperature, threshold=args.semcache_threshold
+            )
+            hit = semcache.lookup(args.instruction)
+            if hit is not None:
+                answer, similarity = hit
+                print(f"(semantic cache hit, similarity {similarity:.3f})", file=sys.stderr)
+                print(answer)
+                return
+
     try:
-        resp = client.chat.completions.create(
-            model=args.model,
-            messages=messages,
-            temperature=args.temperature,
-        )
+        if args.stream:
+            content = write_stream(create(**params, stream=True))
+        else:
+            content = create(**params).choices[0].message.content
     except Exception as e:
         print(f"Request failed: {e}", file=sys.stderr)
         sys.exit(2)
 
-    print(resp.choices[0].message.content)
+    if semcache is not None and content:
+        semcache.add(args.instruction, content)
+    print("" if args.stream else content)
 
 
 if __name__ == "__main__":